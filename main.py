@@ -5,11 +5,20 @@ import os
 import sys
 import re
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
-import PyPDF2
 import logging
 
+# PDF text backends are imported on first use by load_pdf_backend()
+pdfium = None
+PyPDF2 = None
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
 try:
     import mysql.connector
 except ImportError:
@@ -33,6 +42,20 @@ TABLE_COLUMNS_WHITELIST = {
 }
 
 
+def load_pdf_backend() -> None:
+    """
+    Import the PDF text backend once, on first use: pypdfium2 when installed, PyPDF2 otherwise.
+    Keeps the import off CLI start-up for requests that never open a PDF.
+    """
+    global pdfium, PyPDF2
+    if pdfium is not None or PyPDF2 is not None:
+        return
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        import PyPDF2
+
+
 def get_downloads_folder() -> Path:
     """Return the user's Downloads folder (works on Windows, macOS, and Linux)."""
     return Path.home() / "Downloads"
@@ -116,16 +139,19 @@ logging.basicConfig(level=logging.INFO)
 log = logging.getLogger(__name__)
 
 
-class LineItemData:
-    """Helper class to store line item data"""
-    def __init__(self):
-        self.vendor_no = ""
-        self.vendor_name = ""
-        self.cubes = ""
-        self.weight = ""
-        self.pieces = ""
-        self.po = ""
-        self.match_end = 0
+def compile_linear_regex(pattern: str):
+    """
+    Compile a document-scanning pattern with google-re2 (linear time, no catastrophic
+    backtracking) when it is installed. Falls back to re when re2 is missing or rejects
+    the pattern (lookarounds, backreferences). Flags must be inline, e.g. (?i), so both
+    engines read them the same way.
+    """
+    if re2 is not None:
+        try:
+            return re2.compile(pattern)
+        except re2.error:
+            pass
+    return re.compile(pattern)
 
 
 class SobeyTemplate1PdfParser:
@@ -138,25 +164,88 @@ class SobeyTemplate1PdfParser:
     # Must match: vendor number, vendor name (non-greedy), then Cube/Weight/Pieces, then PO
     REGEX_TEMPLATE2 = r"(\d{6})\s+-\s+([^C]+?)\s+Cube\s*:\s*([0-9,]+)\s+Weight\s*:\s*([0-9,]+)\s+Pieces\s*:\s*([0-9,]+)\s+[A-Z]{3}-PO-\d{2}-\d{4}-(\d+)"
     
+    # Patterns compiled once at import instead of on every call.
+    # Only REGEX_TEMPLATE1 goes through compile_linear_regex: its nested .* spans backtrack
+    # polynomially on malformed text. RE2 is several times slower on normal documents, so the
+    # other patterns, which have no such risk, stay on re
+    _TEMPLATE1 = compile_linear_regex(REGEX_TEMPLATE1)
+    _TEMPLATE2_DETECT = re.compile(r'Pickup\s*:\s*\w{3}\s+\d{1,2},\s+\d{4}\s+\d{1,2}:\d{2}:\d{2}')
+    _STOP_PATTERN = re.compile(r'(?s)Stop:\s*(\d+)\s*Destination:\s*(.*?)\s*Stop Location Memo:', re.IGNORECASE)
+    # PO with shipment type, e.g. "AMS-PO-10-2025-4610227518 (GROC)"; group 2 is the PO number, group 3 the type
+    _SHIPMENT = re.compile(r'([A-Z]{3}-PO-\d{2}-\d{4}-(\d+))\s*\(([^)]+)\)', re.IGNORECASE)
+    
+    _VENDOR_WITH_NUMBER = re.compile(r'^\d+\s*-\s*(.*?)\s*-\s*\d+')
+    _VENDOR_NO_NUMBER = re.compile(r'^(.*?)\s*-\s*\d+\s*-')
+    _VENDOR_SIMPLE = re.compile(r'^\d+\s*-\s*(.+?)$')
+    
+    # Template-1 dates (format: "Pickup On : DD/MM/YYYY")
+    _PICKUP_ON = re.compile(r'Pickup\s+On\s*:\s*(\d{2}/\d{2}/\d{4})', re.IGNORECASE)
+    _DELIVER_ON = re.compile(r'Deliver\s+On\s*:\s*(\d{2}/\d{2}/\d{4})', re.IGNORECASE)
+    
+    # Template-2 single-pass scan; match.lastgroup tells which alternative matched:
+    # - shipment: line item, vendor name may span multiple lines. Uses [\s\S]{1,200}? to match any
+    #   character including newlines (non-greedy), stops when it encounters "Cube". The 200-char cap
+    #   is an upper bound on "name - stop - location" strings and keeps failed starts from
+    #   scanning the rest of the document
+    # - pallet: pallet count data (product descriptions). Only the label is consumed; the text is
+    #   captured inside a lookahead so a following pickup/delivery/line item still matches on its own
+    # - pickup: handles both "Pickup :" and "Pickup:"
+    # - deliver: handles "Deliver :", "Delivery :", and variations; same date shape as pickup
+    # Stays on re: RE2 has no lookahead, which the pallet alternative needs
+    _TEMPLATE2_SCAN = re.compile(
+        r'(?P<shipment>(?P<vendor_no>\d{6})\s+-\s+(?P<vendor_name>[\s\S]{1,200}?)\s*Cube\s*:\s*(?P<cubes>[0-9,]+)\s+Weight\s*:\s*(?P<weight>[0-9,]+)\s+Pieces\s*:\s*(?P<pieces>[0-9,]+)\s+[A-Z]{3}-PO-\d{2}-\d{4}-(?P<po>\d+))'
+        r'|(?P<pallet>Pallet\s+Count:(?=\s*(?P<pallet_text>[^\n]+?)(?=\s*(?:Pickup|Delivery|$))))'
+        r'|(?P<pickup>(?i:Pickup\s*:\s*(?P<pickup_date>[A-Za-z]{3}\s+\d{1,2},\s+\d{4}\s+\d{1,2}:\d{2}:\d{2}\s*(?:AM|PM))))'
+        r'|(?P<deliver>(?i:Deliver(?:y)?\s*:\s*(?P<deliver_date>[A-Za-z]{3}\s+\d{1,2},\s+\d{4}\s+\d{1,2}:\d{2}:\d{2}\s*(?:AM|PM))))',
+        re.MULTILINE
+    )
+    _VENDOR_STOP = re.compile(r'-\s*(\d+)\s*-\s*(.+)$')
+    _STOP_NUM = re.compile(r'^(\d+),')
+    _WS = re.compile(r'\s+')
+    # Whitespace that re's \s matches but RE2's ASCII-only \s does not (NBSP, \v, Unicode spaces)
+    _NON_ASCII_WS = re.compile(r'[^\S\t\n\f\r ]')
+    # Lone surrogates, which RE2 cannot encode to UTF-8 (PyPDF2 can emit them)
+    _SURROGATE = re.compile('[\ud800-\udfff]')
+    
+    # Template-2 date format, e.g. "Oct 20, 2025 11:59:00 PM"
+    _DATE_RE = re.compile(r'([A-Za-z]{3})\s+(\d{1,2}),\s+(\d{4})\s+(\d{1,2}):(\d{2}):(\d{2})\s*(AM|PM)', re.IGNORECASE)
+    _MONTHS = {
+        'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
+        'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12,
+    }
+    
     def __init__(self):
         pass
     
+    @staticmethod
+    def _norm_ws(s: str) -> str:
+        """Collapse all whitespace (including newlines) into single spaces"""
+        return SobeyTemplate1PdfParser._WS.sub(' ', s).strip()
+    
+    @staticmethod
+    def _normalize_for_re2(text: str) -> str:
+        """
+        Replace Unicode whitespace with plain spaces and lone surrogates with U+FFFD,
+        so RE2 accepts the text and matches it the same way re does
+        """
+        text = SobeyTemplate1PdfParser._NON_ASCII_WS.sub(' ', text)
+        return SobeyTemplate1PdfParser._SURROGATE.sub('\ufffd', text)
+    
     def convert_date_format(self, date_str: str) -> str:
         """
         Convert date from 'Oct 20, 2025 11:59:00 PM' to '20/10/2025'
+        Any whitespace run (including a line break) may separate the parts
         """
-        try:
-            # Remove any newlines or extra whitespace
-            date_str = re.sub(r'\s+', ' ', date_str).strip()
-            
-            # Parse input format: "Oct 20, 2025 11:59:00 PM"
-            date_obj = datetime.strptime(date_str, "%b %d, %Y %I:%M:%S %p")
-            
-            # Output format: "20/10/2025"
-            return date_obj.strftime("%d/%m/%Y")
-        except Exception as e:
-            log.error(f"Error converting date format: {date_str}, {e}")
+        # The input format is fixed, so a compiled regex and a month table replace strptime;
+        # only the date part is needed, so no datetime object is built
+        match = self._DATE_RE.fullmatch(date_str)
+        month = self._MONTHS.get(match.group(1).title()) if match else None
+        if month is None:
+            log.error("Error converting date format: %s", date_str)
             return date_str  # Return original if conversion fails
+        
+        # Output format: "20/10/2025"
+        return f"{int(match.group(2)):02d}/{month:02d}/{match.group(3)}"
     
     def extract_vendor_name(self, full_vendor_string: str) -> str:
         """
@@ -165,65 +254,64 @@ class SobeyTemplate1PdfParser:
         Returns: "Smucker Foods of Canada"
         Example: "237772 - Agropur Industrial Div"
         Returns: "Agropur Industrial Div"
+        Expects whitespace already normalized with _norm_ws
         """
-        if not full_vendor_string or not full_vendor_string.strip():
+        if not full_vendor_string:
             return ""
         
-        # Clean up the string
-        full_vendor_string = re.sub(r'\s+', ' ', full_vendor_string).strip()
-        
         # Case 1: String starts with vendor number
         # Pattern: "237772 - Agropur Industrial Div - 2 - TRA Location"
-        pattern_with_number = re.compile(r'^\d+\s*-\s*(.*?)\s*-\s*\d+')
-        match_with_number = pattern_with_number.search(full_vendor_string)
+        match_with_number = self._VENDOR_WITH_NUMBER.search(full_vendor_string)
         
         if match_with_number:
             vendor_name = match_with_number.group(1).strip()
-            log.info(f"Extracted vendor name (with number prefix): '{vendor_name}' from: '{full_vendor_string}'")
+            log.info("Extracted vendor name (with number prefix): '%s' from: '%s'", vendor_name, full_vendor_string)
             return vendor_name
         
         # Case 2: String does NOT start with vendor number
         # Pattern: "Smucker Foods of Canada - 24 - TRA St. Johns"
-        pattern_no_number = re.compile(r'^(.*?)\s*-\s*\d+\s*-')
-        match_no_number = pattern_no_number.search(full_vendor_string)
+        match_no_number = self._VENDOR_NO_NUMBER.search(full_vendor_string)
         
         if match_no_number:
             vendor_name = match_no_number.group(1).strip()
-            log.info(f"Extracted vendor name (no number prefix): '{vendor_name}' from: '{full_vendor_string}'")
+            log.info("Extracted vendor name (no number prefix): '%s' from: '%s'", vendor_name, full_vendor_string)
             return vendor_name
         
         # Case 3: Simple format with number at start, no stop number after
         # Pattern: "237772 - Agropur Industrial Div"
-        simple_pattern = re.compile(r'^\d+\s*-\s*(.+?)$')
-        simple_match = simple_pattern.search(full_vendor_string)
+        simple_match = self._VENDOR_SIMPLE.search(full_vendor_string)
         
         if simple_match:
             vendor_name = simple_match.group(1).strip()
-            log.info(f"Extracted vendor name (simple): '{vendor_name}' from: '{full_vendor_string}'")
+            log.info("Extracted vendor name (simple): '%s' from: '%s'", vendor_name, full_vendor_string)
             return vendor_name
         
         # If no match, return the full string cleaned up
-        log.warning(f"Could not extract vendor name from: '{full_vendor_string}', returning full string")
+        log.warning("Could not extract vendor name from: '%s', returning full string", full_vendor_string)
         return full_vendor_string
     
-    def extract_shipment_type(self, text: str, po_number: str) -> str:
+    def _clean_vendor_name(self, vendor_name: str, cache: Dict[str, str]) -> str:
+        """extract_vendor_name memoized per document (the same vendor usually repeats across POs)"""
+        clean_vendor_name = cache.get(vendor_name)
+        if clean_vendor_name is None:
+            clean_vendor_name = cache[vendor_name] = self.extract_vendor_name(vendor_name)
+        return clean_vendor_name
+    
+    def _build_shipment_type_index(self, text: str) -> Dict[str, str]:
         """
-        Extracts the shipment type from the PO number
-        Example: "AMS-PO-10-2025-4610227518 (GROC)" returns "GROC"
+        Map every PO number in the text to its shipment type in a single pass
+        Example: "AMS-PO-10-2025-4610227518 (GROC)" gives {"4610227518": "GROC"}
         """
-        # More flexible pattern - handle extra spaces
-        pattern = re.compile(rf'[A-Z]{{3}}-PO-\d{{2}}-\d{{4}}-{po_number}\s*\(([^)]+)\)', re.IGNORECASE)
-        match = pattern.search(text)
-        if match:
-            return match.group(1).strip()
-        return ""
+        index = {}
+        for match in self._SHIPMENT.finditer(text):
+            # First occurrence of a PO wins
+            index.setdefault(match.group(2), match.group(3).strip())
+        return index
     
     def detect_template(self, text: str) -> str:
         """Detect which template is being used"""
         # Look for "Pickup :" or "Pickup:" with date pattern
-        template2_pattern = re.compile(r'Pickup\s*:\s*\w{3}\s+\d{1,2},\s+\d{4}\s+\d{1,2}:\d{2}:\d{2}')
-        
-        if template2_pattern.search(text):
+        if self._TEMPLATE2_DETECT.search(text):
             log.info("Detected Template 2 (Multiple pickup/delivery dates per line item)")
             return "Template-2"
         else:
@@ -232,63 +320,69 @@ class SobeyTemplate1PdfParser:
     
     def extract_stop_destinations(self, text: str) -> List[str]:
         """Extract stop destinations from the PDF text"""
-        destinations = []
-        stop_pattern = re.compile(r'(?s)Stop:\s*(\d+)\s*Destination:\s*(.*?)\s*Stop Location Memo:', re.IGNORECASE)
+        destinations = {}
         
-        for match in stop_pattern.finditer(text):
-            stop_number = int(match.group(1))
-            destination = match.group(2).strip()
-            
-            # Add to list indexed by stop number (Stop 1 at index 0, etc.)
-            while len(destinations) < stop_number:
-                destinations.append("")
-            destinations[stop_number - 1] = destination
+        for match in self._STOP_PATTERN.finditer(text):
+            destinations[int(match.group(1))] = match.group(2).strip()
+        
+        if not destinations:
+            return []
         
-        return destinations
+        # List indexed by stop number (Stop 1 at index 0, etc.); missing stops are ""
+        return [destinations.get(stop_number, "") for stop_number in range(1, max(destinations) + 1)]
     
     def extract_text_from_pdf(self, pdf_path: str) -> str:
-        """Extract text from PDF file"""
+        """Extract text from PDF file (pypdfium2 when available, PyPDF2 otherwise)"""
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text()
-                return text
+            load_pdf_backend()
+            if pdfium is not None:
+                pdf = pdfium.PdfDocument(pdf_path)
+                try:
+                    # PDFium emits CRLF line breaks; normalize so the template regexes see "\n" like PyPDF2
+                    parts = [pdf[i].get_textpage().get_text_bounded().replace("\r\n", "\n") for i in range(len(pdf))]
+                finally:
+                    pdf.close()
+            else:
+                with open(pdf_path, 'rb') as file:
+                    pdf_reader = PyPDF2.PdfReader(file)
+                    parts = []
+                    for page in pdf_reader.pages:
+                        parts.append(page.extract_text() or "")
+            return self._normalize_for_re2("\n".join(parts))
         except Exception as e:
-            log.error(f"Error extracting text from PDF: {e}")
+            log.error("Error extracting text from PDF: %s", e)
             raise
     
     def process_template1(self, text: str, stop_destinations: List[str]) -> List[Dict]:
         """Process Template 1 PDF"""
         records = []
-        pattern = re.compile(self.REGEX_TEMPLATE1)
+        shipment_index = self._build_shipment_type_index(text)
+        vendor_cache = {}
         
         # Extract pickup and delivery dates for Template-1 (format: "Pickup On : DD/MM/YYYY")
-        pickup_on_pattern = re.compile(r'Pickup\s+On\s*:\s*(\d{2}/\d{2}/\d{4})', re.IGNORECASE)
-        deliver_on_pattern = re.compile(r'Deliver\s+On\s*:\s*(\d{2}/\d{2}/\d{4})', re.IGNORECASE)
-        
-        pickup_date_match = pickup_on_pattern.search(text)
-        deliver_date_match = deliver_on_pattern.search(text)
+        pickup_date_match = self._PICKUP_ON.search(text)
+        deliver_date_match = self._DELIVER_ON.search(text)
         
         pickup_date = pickup_date_match.group(1) if pickup_date_match else ""
         del_date = deliver_date_match.group(1) if deliver_date_match else ""
         
-        log.info(f"Template-1: Found pickup_date={pickup_date}, del_date={del_date}")
+        log.info("Template-1: Found pickup_date=%s, del_date=%s", pickup_date, del_date)
         
         # Extract ship_from from Stop 1 (index 0)
         ship_from = ""
         if len(stop_destinations) > 0:
             ship_from = stop_destinations[0]  # Stop 1 is at index 0
-            log.info(f"Template-1: Using Stop 1 as ship_from: {ship_from}")
+            log.info("Template-1: Using Stop 1 as ship_from: %s", ship_from)
         
         # Extract ship_to from Stop 2 (index 1)
         ship_to = ""
         if len(stop_destinations) > 1:
             ship_to = stop_destinations[1]  # Stop 2 is at index 1
-            log.info(f"Template-1: Using Stop 2 as ship_to: {ship_to}")
+            log.info("Template-1: Using Stop 2 as ship_to: %s", ship_to)
         
-        for match in pattern.finditer(text):
+        # Scans the whole text rather than windows around "Cube": the \s runs on either side of the
+        # pattern cross line breaks with no upper bound, so no window size gives identical matches
+        for match in self._TEMPLATE1.finditer(text):
             # Extract description from Pallet Count (group 7)
             description = match.group(7).strip() if match.group(7) else ''
             
@@ -299,15 +393,16 @@ class SobeyTemplate1PdfParser:
             # If description is still empty, try to extract it directly from text near the PO
             if not description:
                 po_number = match.group(6)
-                # Look for Pallet Count near the PO number
+                # Look for Pallet Count near the PO number (assumed within 500 chars, which
+                # leaves room for the Ref Number block between them)
                 po_context_pattern = re.compile(
-                    rf'{re.escape(po_number)}[\s\S]*?Pallet\s+Count:\s*([^\n|]+?)(?=\s*[|]|\s*Cube|\s*Weight|$)',
+                    rf'{re.escape(po_number)}[\s\S]{{0,500}}?Pallet\s+Count:\s*([^\n|]+?)(?=\s*[|]|\s*Cube|\s*Weight|$)',
                     re.IGNORECASE | re.MULTILINE
                 )
                 po_context_match = po_context_pattern.search(text)
                 if po_context_match:
                     description = po_context_match.group(1).strip()
-                    log.info(f"Template-1: Extracted description from context: {description}")
+                    log.info("Template-1: Extracted description from context: %s", description)
             
             record = {
                 'template': 'Template-1',
@@ -316,12 +411,12 @@ class SobeyTemplate1PdfParser:
                 'ship_from': ship_from,
                 'ship_to': ship_to,
                 'vendor_no': match.group(1),
-                'vendor_name': self.extract_vendor_name(match.group(2)),
+                'vendor_name': self._clean_vendor_name(self._norm_ws(match.group(2)), vendor_cache),
                 'cubes': match.group(3),
                 'weight': match.group(4),
                 'pieces': match.group(5),
                 'po': match.group(6),
-                'shipment_type': self.extract_shipment_type(text, match.group(6)),
+                'shipment_type': shipment_index.get(match.group(6), ""),
                 'pallets': '',
                 'description': description
             }
@@ -333,63 +428,70 @@ class SobeyTemplate1PdfParser:
     def process_template2(self, text: str, stop_destinations: List[str]) -> List[Dict]:
         """Process Template 2 PDF"""
         records = []
+        shipment_index = self._build_shipment_type_index(text)
+        vendor_cache = {}
         
-        # FIXED: Extract line items with better regex that handles line breaks
-        line_items = []
-        
-        # Pattern that allows vendor name to span multiple lines
-        # Uses [\s\S]*? to match any character including newlines (non-greedy)
-        # Stops when it encounters "Cube" (with optional whitespace before it)
-        shipment_pattern = re.compile(
-            r'(\d{6})\s+-\s+([\s\S]+?)(?=\s*Cube\s*:)\s*Cube\s*:\s*([0-9,]+)\s+Weight\s*:\s*([0-9,]+)\s+Pieces\s*:\s*([0-9,]+)\s+([A-Z]{3}-PO-\d{2}-\d{4}-(\d+))',
-            re.MULTILINE
-        )
-        
-        for match in shipment_pattern.finditer(text):
-            item = LineItemData()
-            item.vendor_no = match.group(1)
-            raw_vendor_name = match.group(2)
-            # Clean up vendor name - collapse all whitespace including newlines into single spaces
-            item.vendor_name = re.sub(r'\s+', ' ', raw_vendor_name).strip()
-            item.cubes = match.group(3)
-            item.weight = match.group(4)
-            item.pieces = match.group(5)
-            item.po = match.group(7)  # PO number from group 7
-            item.match_end = match.end()
-            
-            log.info(f"Captured line item: VendorNo={item.vendor_no}, VendorName={item.vendor_name}, PO={item.po}")
-            line_items.append(item)
-        
-        log.info(f"Found {len(line_items)} line items in Template-2")
-        
-        # Extract pallet count data (product descriptions)
-        pallet_pattern = re.compile(r'Pallet\s+Count:\s*([^\n]+?)(?=\s*(?:Pickup|Delivery|$))', re.MULTILINE | re.DOTALL)
+        # Extract line items, pallet data, pickup and delivery dates in one pass over the text.
+        # Each list stays in document order, which the index-based pairing below relies on.
+        # Line item fields are kept as parallel lists (one entry per line item).
+        vendor_nos = []
+        vendor_names = []
+        cube_counts = []
+        weights = []
+        piece_counts = []
+        pos = []
         pallet_data = []
-        for match in pallet_pattern.finditer(text):
-            pallet = match.group(1).strip()
-            if pallet:
-                log.info(f"Captured pallet data: {pallet}")
-                pallet_data.append(pallet)
+        pickup_dates = []
+        delivery_dates = []
+        # End of the last pallet capture. A standalone pallet scan consumed its capture, so a
+        # "Pallet Count:" label inside that text never started a pallet of its own
+        pallet_end = 0
         
-        # Extract pickup dates - handle both "Pickup :" and "Pickup:"
-        pickup_pattern = re.compile(r'Pickup\s*:\s*([A-Za-z]{3}\s+\d{1,2},\s+\d{4}\s+\d{1,2}:\d{2}:\d{2}\s*(?:AM|PM))', re.IGNORECASE)
-        
-        # Extract delivery dates - handle "Deliver :", "Delivery :", and variations
-        deliver_pattern = re.compile(r'Deliver(?:y)?\s*:\s*([A-Za-z]{3}\s+\d{1,2},\s+\d{4}[\s\S]*?\d{1,2}:\d{2}:\d{2}\s*(?:AM|PM))', re.IGNORECASE)
-        
-        pickup_dates = [match.group(1) for match in pickup_pattern.finditer(text)]
-        delivery_dates = [re.sub(r'\s+', ' ', match.group(1)).strip() for match in deliver_pattern.finditer(text)]
+        for match in self._TEMPLATE2_SCAN.finditer(text):
+            kind = match.lastgroup
+            if kind == 'shipment':
+                vendor_nos.append(match.group('vendor_no'))
+                # Clean up vendor name - collapse all whitespace including newlines into single spaces
+                vendor_names.append(self._norm_ws(match.group('vendor_name')))
+                cube_counts.append(match.group('cubes'))
+                weights.append(match.group('weight'))
+                piece_counts.append(match.group('pieces'))
+                pos.append(match.group('po'))
+                
+                log.info("Captured line item: VendorNo=%s, VendorName=%s, PO=%s", vendor_nos[-1], vendor_names[-1], pos[-1])
+            elif kind == 'pallet':
+                if match.start() < pallet_end:
+                    continue
+                pallet_end = match.end('pallet_text')
+                pallet = match.group('pallet_text').strip()
+                if pallet:
+                    log.info("Captured pallet data: %s", pallet)
+                    pallet_data.append(pallet)
+            elif kind == 'pickup':
+                pickup_dates.append(match.group('pickup_date'))
+            else:
+                delivery_dates.append(match.group('deliver_date'))
         
-        log.info(f"Found {len(pickup_dates)} pickup dates and {len(delivery_dates)} delivery dates")
+        log.info("Found %s line items in Template-2", len(vendor_nos))
+        log.info("Found %s pickup dates and %s delivery dates", len(pickup_dates), len(delivery_dates))
         
         # Extract ship_from from Stop 1 (index 0) for Template-2
         ship_from = ""
         if len(stop_destinations) > 0:
             ship_from = stop_destinations[0]  # Stop 1 is at index 0
-            log.info(f"Template-2: Using Stop 1 as ship_from: {ship_from}")
+            log.info("Template-2: Using Stop 1 as ship_from: %s", ship_from)
+        
+        # Map stop number -> destination once (destinations look like "24, TRA St. Johns, NL").
+        # First destination wins for a repeated stop number, as in the original linear search.
+        stop_by_num = {}
+        for stop_dest in stop_destinations:
+            stop_num_match = self._STOP_NUM.match(stop_dest)
+            if stop_num_match:
+                stop_by_num.setdefault(stop_num_match.group(1), stop_dest)
         
         # Process each line item
-        for idx, item in enumerate(line_items):
+        line_items = zip(vendor_nos, vendor_names, cube_counts, weights, piece_counts, pos)
+        for idx, (vendor_no, vendor_name, cubes, weight, pieces, po) in enumerate(line_items):
             # Get dates for this line item
             pickup_date = pickup_dates[idx] if idx < len(pickup_dates) else ""
             delivery_date = delivery_dates[idx] if idx < len(delivery_dates) else ""
@@ -400,39 +502,30 @@ class SobeyTemplate1PdfParser:
             
             # Extract ship_to based on stop number in vendor name
             ship_to = ""
-            vendor_stop_pattern = re.compile(r'-\s*(\d+)\s*-\s*(.+)$')
-            vendor_stop_match = vendor_stop_pattern.search(item.vendor_name)
+            vendor_stop_match = self._VENDOR_STOP.search(vendor_name)
             
             if vendor_stop_match:
                 vendor_stop_num = vendor_stop_match.group(1).strip()
-                log.info(f"Extracted stop number '{vendor_stop_num}' from vendor name: {item.vendor_name}")
+                log.info("Extracted stop number '%s' from vendor name: %s", vendor_stop_num, vendor_name)
                 
                 # Find matching stop destination
-                for stop_idx in range(len(stop_destinations)):
-                    stop_dest = stop_destinations[stop_idx]
-                    stop_num_pattern = re.compile(r'^(\d+),')
-                    stop_num_match = stop_num_pattern.search(stop_dest)
-                    if stop_num_match:
-                        dest_stop_num = stop_num_match.group(1).strip()
-                        if dest_stop_num == vendor_stop_num:
-                            ship_to = stop_dest
-                            log.info(f"Matched vendor stop '{vendor_stop_num}' with destination stop: {stop_dest}")
-                            break
-                
-                if not ship_to:
-                    log.warning(f"No matching destination found for stop number: {vendor_stop_num}")
+                ship_to = stop_by_num.get(vendor_stop_num, "")
+                if ship_to:
+                    log.info("Matched vendor stop '%s' with destination stop: %s", vendor_stop_num, ship_to)
+                else:
+                    log.warning("No matching destination found for stop number: %s", vendor_stop_num)
             else:
-                log.warning(f"Could not extract stop number from vendor name: {item.vendor_name}")
+                log.warning("Could not extract stop number from vendor name: %s", vendor_name)
             
             # Get description from pallet data
             description = pallet_data[idx] if idx < len(pallet_data) else ""
             
             # Extract clean vendor name
-            clean_vendor_name = self.extract_vendor_name(item.vendor_name)
-            log.info(f"Processing line item {idx}: Full vendor='{item.vendor_name}' -> Clean vendor='{clean_vendor_name}'")
+            clean_vendor_name = self._clean_vendor_name(vendor_name, vendor_cache)
+            log.info("Processing line item %s: Full vendor='%s' -> Clean vendor='%s'", idx, vendor_name, clean_vendor_name)
             
             # Extract shipment type from PO
-            shipment_type = self.extract_shipment_type(text, item.po)
+            shipment_type = shipment_index.get(po, "")
             
             record = {
                 'template': 'Template-1',  # Hardcoded as per original Java code
@@ -440,12 +533,12 @@ class SobeyTemplate1PdfParser:
                 'pickup_date': formatted_pickup_date,
                 'ship_from': ship_from,
                 'ship_to': ship_to,
-                'vendor_no': item.vendor_no,
+                'vendor_no': vendor_no,
                 'vendor_name': clean_vendor_name,
-                'cubes': item.cubes,
-                'weight': item.weight,
-                'pieces': item.pieces,
-                'po': item.po,
+                'cubes': cubes,
+                'weight': weight,
+                'pieces': pieces,
+                'po': po,
                 'shipment_type': shipment_type,
                 'pallets': '',
                 'description': description
@@ -493,7 +586,7 @@ class SobeyTemplate1PdfParser:
             }
             
         except Exception as e:
-            log.error(f"Error processing PDF: {e}", exc_info=True)
+            log.error("Error processing PDF: %s", e, exc_info=True)
             return {
                 "error": str(e),
                 "capability": "parse_pdf"
@@ -516,13 +609,25 @@ class SobeyTemplate1PdfParser:
                     "capability": "parse_directory"
                 }
             
+            pdf_paths = [str(pdf_file) for pdf_file in pdf_files]
+            if len(pdf_paths) == 1:
+                file_results = [self.parse_pdf(pdf_paths[0])]
+            else:
+                # Each PDF is independent, so parse them in worker processes (one per core)
+                max_workers = min(len(pdf_paths), os.cpu_count() or 1)
+                with ProcessPoolExecutor(
+                    max_workers=max_workers,
+                    initializer=_init_worker,
+                    initargs=(logging.getLogger().level,),
+                ) as executor:
+                    file_results = list(executor.map(_parse_one, pdf_paths))
+            
             results = []
-            for pdf_file in pdf_files:
-                result = self.parse_pdf(str(pdf_file))
+            for pdf_path, result in zip(pdf_paths, file_results):
                 if "result" in result:
                     results.append(result["result"])
                 else:
-                    results.append({"file": str(pdf_file), "error": result.get("error", "Unknown error")})
+                    results.append({"file": pdf_path, "error": result.get("error", "Unknown error")})
             
             return {
                 "result": {
@@ -534,13 +639,24 @@ class SobeyTemplate1PdfParser:
             }
             
         except Exception as e:
-            log.error(f"Error processing directory: {e}", exc_info=True)
+            log.error("Error processing directory: %s", e, exc_info=True)
             return {
                 "error": str(e),
                 "capability": "parse_directory"
             }
 
 
+def _init_worker(log_level: int) -> None:
+    """Apply the parent's root log level in a parse_directory worker process"""
+    # Spawned workers re-import this module, which re-runs logging.basicConfig at INFO
+    logging.getLogger().setLevel(log_level)
+
+
+def _parse_one(pdf_path: str) -> Dict:
+    """Parse a single PDF in a parse_directory worker process (module-level so it pickles)"""
+    return SobeyTemplate1PdfParser().parse_pdf(pdf_path)
+
+
 def main():
     """Main entry point - reads JSON from stdin; saves full result to file, prints only save location."""
     # Silence all logging to the terminal (full output is only in the saved text file)